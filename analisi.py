@@ -0,0 +1,20 @@
+from typing import NamedTuple
+
+
+# Sta in un modulo importabile e non in si.py: Streamlit riesegue lo script
+# in un nuovo modulo __main__ a ogni esecuzione, e st.cache_data non potrebbe
+# serializzare un'istanza della classe di un'esecuzione precedente
+class Analisi(NamedTuple):
+    """Risultato dell'analisi di stile di un testo"""
+    parole_totali: int
+    frasi_totali: int
+    lunghezza_media_frasi: float
+    vocab_unico: int
+    ricchezza_lessicale: float
+    aggettivi: int
+    avverbi: int
+    verbi: int
+    sostantivi: int
+    leggibilita: float
+    tono_positivo: float
+    tono_negativo: float
@@ -1,10 +1,54 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
 import re
 from collections import Counter
 import os
 import ssl
+import threading
+from types import MappingProxyType
+
+from analisi import Analisi
+
+# Espressioni regolari precompilate
+_PUNCT_RE = re.compile(r'[^\w\s]')
+_WORD_RE = re.compile(r'\b\w+\b')
+# Una frase: testo non vuoto fino al prossimo terminatore
+_FRASE_RE = re.compile(r'[^.!?\s][^.!?]*')
+
+# Gruppi di tag POS (Penn Treebank)
+_TAG_AGGETTIVI = frozenset(('JJ', 'JJR', 'JJS'))
+_TAG_AVVERBI = frozenset(('RB', 'RBR', 'RBS'))
+_TAG_VERBI = frozenset(('VB', 'VBD', 'VBG', 'VBN', 'VBP', 'VBZ'))
+_TAG_SOSTANTIVI = frozenset(('NN', 'NNS', 'NNP', 'NNPS'))
+
+_GRUPPI_TAG = (_TAG_AGGETTIVI, _TAG_AVVERBI, _TAG_VERBI, _TAG_SOSTANTIVI)
+
+# Stima delle parti del discorso dai suffissi italiani, in ordine di priorità
+_SUFFISSI_POS = (
+    (('mente',), 'RB'),
+    (('are', 'ere', 'ire', 'ando', 'endo', 'ato', 'ata', 'ati', 'ate', 'ito', 'ita',
+      'iti', 'ite', 'uto', 'uta', 'uti', 'ute', 'ava', 'avano', 'eva', 'evano', 'ivano'), 'VB'),
+    (('oso', 'osa', 'osi', 'ose', 'ivo', 'iva', 'ivi', 'ive', 'ale', 'ali', 'ile', 'ili',
+      'ico', 'ica', 'ici', 'iche', 'ante', 'anti', 'evole', 'evoli'), 'JJ'),
+)
+_PAROLE_FUNZIONALI = frozenset((
+    'della', 'delle', 'degli', 'dello', 'nella', 'nelle', 'negli', 'nello', 'dalla',
+    'dalle', 'dagli', 'dallo', 'alla', 'alle', 'agli', 'allo', 'sulla', 'sulle',
+    'sugli', 'sullo', 'come', 'anche', 'quando', 'perché', 'mentre', 'questo',
+    'questa', 'questi', 'queste', 'quello', 'quella', 'quelli', 'quelle', 'ogni',
+    'loro', 'sono', 'essere', 'avere', 'tutto', 'tutti', 'molto', 'sempre', 'ancora',
+    'sotto', 'sopra', 'dopo', 'prima', 'senza', 'verso', 'dentro', 'fuori', 'oltre'
+))
+
+# Leggibilità: punteggio dei testi senza parole o frasi, e limiti del punteggio
+_LEGGIBILITA_NEUTRA = 50
+_LIMITI_LEGGIBILITA = (0, 100)
+
+# Token che separa i testi analizzati insieme (il tagger lo tratta come fine frase)
+_SEPARATORE_TESTI = '.'
+
+# Parole chiave per l'analisi del tono
+_PAROLE_POS = frozenset(('buono', 'bello', 'fantastico', 'eccellente', 'meraviglioso', 'positivo', 'felice', 'gioia'))
+_PAROLE_NEG = frozenset(('cattivo', 'brutto', 'terribile', 'orribile', 'pessimo', 'negativo', 'triste', 'dolore'))
 
 # Configurazione iniziale
 st.set_page_config(
@@ -20,10 +64,18 @@ Analizza il tuo stile di scrittura personale e ricevi strategie di miglioramento
 personalizzate basate sulle **intelligenze multiple** di Howard Gardner.
 """)
 
-# Tentativo di import NLTK con gestione errori
-try:
-    import nltk
-    
+# Risorse NLTK necessarie: (percorso nei dati NLTK, pacchetto da scaricare)
+_RISORSE_NLTK = (
+    ('tokenizers/punkt', 'punkt'),
+    ('tokenizers/punkt_tab', 'punkt_tab'),
+    ('taggers/averaged_perceptron_tagger', 'averaged_perceptron_tagger'),
+    # Nome del modello caricato da PerceptronTagger a partire da NLTK 3.9
+    ('taggers/averaged_perceptron_tagger_eng', 'averaged_perceptron_tagger_eng'),
+)
+
+@st.cache_resource(show_spinner=False)
+def _bootstrap_nltk():
+    """Scarica le risorse NLTK mancanti una sola volta per processo"""
     # Disabilita verifica SSL per evitare problemi di download
     try:
         _create_unverified_https_context = ssl._create_unverified_context
@@ -31,20 +83,21 @@ try:
         pass
     else:
         ssl._create_default_https_context = _create_unverified_https_context
+    
+    for percorso, pacchetto in _RISORSE_NLTK:
+        try:
+            nltk.data.find(percorso)
+        except LookupError:
+            nltk.download(pacchetto, quiet=True)
 
+# Tentativo di import NLTK con gestione errori
+try:
+    import nltk
+    
     # Download delle risorse NLTK necessarie
-    try:
-        nltk.data.find('tokenizers/punkt')
-    except LookupError:
-        nltk.download('punkt')
+    _bootstrap_nltk()
 
-    try:
-        nltk.data.find('taggers/averaged_perceptron_tagger')
-    except LookupError:
-        nltk.download('averaged_perceptron_tagger')
-
-    from nltk.tokenize import sent_tokenize, word_tokenize
-    from nltk.tag import pos_tag
+    from nltk.tokenize import word_tokenize
     
     nltk_available = True
     
@@ -55,6 +108,92 @@ except Exception as e:
     st.warning(f"⚠️ Problema con NLTK: {str(e)}. Usando metodi alternativi.")
     nltk_available = False
 
+@st.cache_resource(show_spinner=False)
+def _get_tagger():
+    """Carica il POS tagger una sola volta per processo"""
+    from nltk.tag import PerceptronTagger
+    return PerceptronTagger()
+
+@st.cache_resource(show_spinner=False)
+def _punkt():
+    """Carica il tokenizzatore di frasi Punkt una sola volta per processo"""
+    try:
+        from nltk.tokenize import PunktTokenizer
+    except ImportError:
+        # NLTK < 3.8.2: modello in formato pickle
+        return nltk.data.load('tokenizers/punkt/english.pickle')
+    return PunktTokenizer('english')
+
+@st.cache_resource(show_spinner=False)
+def _get_nlp():
+    """Pipeline spaCy vuota con sentencizer, se spaCy è installato (opzionale)"""
+    try:
+        import spacy
+        nlp = spacy.blank('it')
+        nlp.add_pipe('sentencizer')
+    except Exception:
+        # spaCy assente o non importabile (es. binari NumPy incompatibili)
+        return None
+    return nlp
+
+def _conta_frasi_codepoint(codepoint):
+    """Conta i tratti non vuoti tra terminatori .!? (stesso criterio di _FRASE_RE)"""
+    frasi = 0
+    in_frase = False
+    for c in codepoint:
+        if c == 46 or c == 33 or c == 63:
+            in_frase = False
+        elif not in_frase:
+            # Stessi caratteri di str.isspace()
+            spazio = (9 <= c <= 13 or 0x1c <= c <= 0x20 or c == 0x85 or c == 0xa0
+                      or c == 0x1680 or 0x2000 <= c <= 0x200a or c == 0x2028
+                      or c == 0x2029 or c == 0x202f or c == 0x205f or c == 0x3000)
+            if not spazio:
+                in_frase = True
+                frasi += 1
+    return frasi
+
+@st.cache_resource(show_spinner=False)
+def _kernel_frasi():
+    """Compila con Numba il conteggio delle frasi, se Numba è installato (opzionale)"""
+    try:
+        from numba import njit
+    except ImportError:
+        return None
+    import numpy as np
+    kernel = njit(cache=True)(_conta_frasi_codepoint)
+    kernel(np.zeros(0, dtype=np.uint32))  # compila subito
+    return kernel
+
+def _precarica(carica):
+    """Esegue un caricatore; dice se è andato a buon fine"""
+    try:
+        carica()
+    except Exception:
+        # L'errore si ripresenterà, gestito, al momento dell'analisi
+        return False
+    return True
+
+def _warmup():
+    """Precarica tagger e tokenizzatori mentre l'interfaccia viene disegnata"""
+    punkt_pronto = False
+    if nltk_available:
+        _precarica(_get_tagger)
+        punkt_pronto = _precarica(_punkt)
+    _precarica(_get_nlp)
+    
+    # Il kernel Numba serve solo al conteggio semplice delle frasi: senza
+    # Punkt lo si compila subito, altrimenti al primo uso
+    if not punkt_pronto:
+        _precarica(_kernel_frasi)
+
+@st.cache_resource(show_spinner=False)
+def _avvia_warmup():
+    """Avvia il precaricamento una sola volta per processo"""
+    threading.Thread(target=_warmup, daemon=True).start()
+
+_avvia_warmup()
+
 # Sidebar per informazioni
 with st.sidebar:
     st.header("Informazioni")
@@ -72,43 +211,147 @@ with st.sidebar:
 # Funzioni di fallback se NLTK non è disponibile
 def tokenizza_testo_semplice(testo):
     """Tokenizzazione semplice senza NLTK"""
-    return re.findall(r'\b\w+\b', testo.lower())
+    return _WORD_RE.findall(testo.lower())
 
 def conta_frasi_semplice(testo):
     """Conta frasi senza NLTK"""
-    return len([f for f in re.split(r'[.!?]+', testo) if f.strip()])
+    kernel = _kernel_frasi()
+    if kernel is not None:
+        import numpy as np
+        codepoint = np.frombuffer(testo.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+        return int(kernel(codepoint))
+    return sum(1 for _ in _FRASE_RE.finditer(testo))
 
-def calcola_leggibilita_semplice(testo):
-    """Calcola leggibilità senza NLTK"""
-    parole = tokenizza_testo_semplice(testo)
-    frasi = conta_frasi_semplice(testo)
+def _formula_leggibilita(lunghezza_media_frasi, lunghezza_media_parole):
+    """Punteggio di leggibilità non limitato; accetta numeri o array NumPy"""
+    return 100 - (lunghezza_media_frasi * 1.5) - (lunghezza_media_parole * 8)
+
+def calcola_leggibilita_semplice(parole, frasi, lettere):
+    """Calcola leggibilità senza NLTK dai conteggi di parole, frasi e lettere"""
+    if parole == 0 or frasi == 0:
+        return _LEGGIBILITA_NEUTRA
     
-    if len(parole) == 0 or frasi == 0:
-        return 50
+    leggibilita = _formula_leggibilita(parole / frasi, lettere / parole)
+    minimo, massimo = _LIMITI_LEGGIBILITA
+    return max(minimo, min(massimo, leggibilita))
+
+# Funzioni principali
+def conta_pos(tagged):
+    """Conta aggettivi, avverbi, verbi e sostantivi tra i token etichettati"""
+    conteggi_tag = Counter(pos for _, pos in tagged)
+    return tuple(sum(conteggi_tag[t] for t in gruppo) for gruppo in _GRUPPI_TAG)
+
+def conta_tono(conteggi_parole):
+    """Conta parole positive e negative a partire dalle frequenze"""
+    return (sum(conteggi_parole[w] for w in _PAROLE_POS),
+            sum(conteggi_parole[w] for w in _PAROLE_NEG))
+
+def conta_lettere(conteggi_parole):
+    """Conta le lettere del testo a partire dalle frequenze delle parole"""
+    return sum(len(w) * n for w, n in conteggi_parole.items())
+
+def stima_pos(parole):
+    """Stima i tag POS dai suffissi italiani, senza modelli"""
+    tagged = []
+    for parola in parole:
+        p = parola.lower()
+        if len(p) < 5 or p in _PAROLE_FUNZIONALI:
+            tag = 'IN'
+        else:
+            tag = 'NN'
+            for suffissi, tag_suffisso in _SUFFISSI_POS:
+                if p.endswith(suffissi):
+                    tag = tag_suffisso
+                    break
+        tagged.append((parola, tag))
+    return tagged
+
+def etichetta_pos(parole):
+    """Etichetta le parole con il tagger NLTK, o con la stima dai suffissi"""
+    if nltk_available:
+        try:
+            return _get_tagger().tag(parole)
+        except LookupError:
+            # Modello del tagger non scaricato: si tengono token e frasi
+            pass
+    return stima_pos(parole)
+
+def conta_frasi(testo):
+    """Conta le frasi con NLTK, ripiegando sul conteggio semplice"""
+    try:
+        return len(_punkt().tokenize(testo))
+    except LookupError:
+        return conta_frasi_semplice(testo)
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def tokenizza_testo(testo):
+    """Restituisce parole e numero di frasi, in un solo passaggio se c'è spaCy"""
+    nlp = _get_nlp()
+    if nlp is not None:
+        doc = nlp(testo)
+        # Come negli altri percorsi: numeri e forme elise (dell', c') restano
+        # parole; la punteggiatura interna viene tolta come fa _PUNCT_RE
+        token = (_PUNCT_RE.sub('', t.text) for t in doc if not (t.is_punct or t.is_space))
+        return [p for p in token if p], sum(1 for _ in doc.sents)
     
-    lunghezza_media_frasi = len(parole) / frasi
-    lunghezza_media_parole = sum(len(p) for p in parole) / len(parole)
+    # Senza punteggiatura non serve dividere in frasi
+    parole = word_tokenize(_PUNCT_RE.sub('', testo), preserve_line=True)
+    return parole, conta_frasi(testo)
+
+def conta_parole(testo):
+    """Conta le parole con lo stesso tokenizzatore usato dall'analisi"""
+    if nltk_available or _get_nlp() is not None:
+        try:
+            # Il risultato resta in cache e viene riusato da analizza_stile
+            return len(tokenizza_testo(testo)[0])
+        except Exception:
+            pass
+    return len(tokenizza_testo_semplice(testo))
+
+def calcola_metriche(parole, frasi_totali, conteggi_pos):
+    """Calcola le metriche di stile da parole, numero di frasi e conteggi POS"""
+    parole_totali = len(parole)
+    aggettivi, avverbi, verbi, sostantivi = conteggi_pos
+    
+    # Le parole sono portate in minuscolo una sola volta; le maiuscole
+    # restano solo nella lista usata dal POS tagger
+    conteggi_parole = Counter(map(str.lower, parole))
+    lunghezza_media_frasi = parole_totali / frasi_totali if frasi_totali > 0 else 0
+    vocab_unico = len(conteggi_parole)
+    ricchezza_lessicale = vocab_unico / parole_totali if parole_totali > 0 else 0
+    leggibilita = calcola_leggibilita_semplice(parole_totali, frasi_totali, conta_lettere(conteggi_parole))
     
-    leggibilita = 100 - (lunghezza_media_frasi * 1.5) - (lunghezza_media_parole * 8)
-    return max(0, min(100, leggibilita))
+    # Analisi del tono
+    parole_positive, parole_negative = conta_tono(conteggi_parole)
+    tono_positivo = parole_positive / parole_totali if parole_totali > 0 else 0
+    tono_negativo = parole_negative / parole_totali if parole_totali > 0 else 0
+    
+    return Analisi(
+        parole_totali=parole_totali,
+        frasi_totali=frasi_totali,
+        lunghezza_media_frasi=lunghezza_media_frasi,
+        vocab_unico=vocab_unico,
+        ricchezza_lessicale=ricchezza_lessicale,
+        aggettivi=aggettivi,
+        avverbi=avverbi,
+        verbi=verbi,
+        sostantivi=sostantivi,
+        leggibilita=leggibilita,
+        tono_positivo=tono_positivo,
+        tono_negativo=tono_negativo
+    )
 
-# Funzioni principali
+@st.cache_data(show_spinner=False, max_entries=128)
 def analizza_stile(testo):
     """Analizza vari aspetti dello stile di scrittura"""
     
-    if nltk_available:
+    if nltk_available or _get_nlp() is not None:
         try:
-            # Usa NLTK se disponibile
-            parole = word_tokenize(re.sub(r'[^\w\s]', '', testo))
-            frasi_totali = len(sent_tokenize(testo))
-            parole_totali = len(parole)
+            # Usa NLTK o spaCy se disponibili
+            parole, frasi_totali = tokenizza_testo(testo)
             
-            # Analisi POS con NLTK
-            tagged = pos_tag(parole)
-            aggettivi = len([word for word, pos in tagged if pos in ['JJ', 'JJR', 'JJS']])
-            avverbi = len([word for word, pos in tagged if pos in ['RB', 'RBR', 'RBS']])
-            verbi = len([word for word, pos in tagged if pos in ['VB', 'VBD', 'VBG', 'VBN', 'VBP', 'VBZ']])
-            sostantivi = len([word for word, pos in tagged if pos in ['NN', 'NNS', 'NNP', 'NNPS']])
+            # Analisi POS con NLTK, o stimata se c'è solo spaCy
+            tagged = etichetta_pos(parole)
             
         except Exception:
             # Fallback a metodi semplici
@@ -117,154 +360,194 @@ def analizza_stile(testo):
         # Usa metodi semplici
         return analizza_stile_semplice(testo)
     
-    # Calcoli comuni
-    lunghezza_media_frasi = parole_totali / frasi_totali if frasi_totali > 0 else 0
-    vocab_unico = len(set(parole))
-    ricchezza_lessicale = vocab_unico / parole_totali if parole_totali > 0 else 0
-    leggibilita = calcola_leggibilita_semplice(testo)
-    
-    # Analisi del tono
-    parole_pos_lista = ['buono', 'bello', 'fantastico', 'eccellente', 'meraviglioso', 'positivo', 'felice', 'gioia']
-    parole_neg_lista = ['cattivo', 'brutto', 'terribile', 'orribile', 'pessimo', 'negativo', 'triste', 'dolore']
+    return calcola_metriche(parole, frasi_totali, conta_pos(tagged))
+
+def _tokenizza_batch(testi):
+    """Tokenizza più testi ed etichetta i loro token con un solo passaggio del POS tagger"""
     
-    parole_positive = sum(1 for word in parole if word.lower() in parole_pos_lista)
-    parole_negative = sum(1 for word in parole if word.lower() in parole_neg_lista)
-    tono_positivo = parole_positive / parole_totali if parole_totali > 0 else 0
-    tono_negativo = parole_negative / parole_totali if parole_totali > 0 else 0
+    if nltk_available or _get_nlp() is not None:
+        try:
+            # Le frasi vanno contate per testo; i token di tutti i testi
+            # vengono etichettati insieme, separati da un punto
+            tokenizzati = [tokenizza_testo(testo) for testo in testi]
+            sequenza = []
+            for parole, _ in tokenizzati:
+                sequenza.extend(parole)
+                sequenza.append(_SEPARATORE_TESTI)
+            tagged = etichetta_pos(sequenza)
+            
+        except Exception:
+            pass
+        else:
+            risultati = []
+            inizio = 0
+            for parole, frasi_totali in tokenizzati:
+                fine = inizio + len(parole)
+                risultati.append((parole, frasi_totali, tagged[inizio:fine]))
+                inizio = fine + 1  # salta il separatore
+            return risultati
     
-    return {
-        'parole_totali': parole_totali,
-        'frasi_totali': frasi_totali,
-        'lunghezza_media_frasi': lunghezza_media_frasi,
-        'vocab_unico': vocab_unico,
-        'ricchezza_lessicale': ricchezza_lessicale,
-        'aggettivi': aggettivi,
-        'avverbi': avverbi,
-        'verbi': verbi,
-        'sostantivi': sostantivi,
-        'leggibilita': leggibilita,
-        'tono_positivo': tono_positivo,
-        'tono_negativo': tono_negativo
-    }
+    # Metodi semplici
+    risultati = []
+    for testo in testi:
+        parole = tokenizza_testo_semplice(testo)
+        risultati.append((parole, conta_frasi_semplice(testo), stima_pos(parole)))
+    return risultati
 
-def analizza_stile_semplice(testo):
-    """Analisi semplificata senza NLTK"""
-    parole = tokenizza_testo_semplice(testo)
-    frasi_totali = conta_frasi_semplice(testo)
-    parole_totali = len(parole)
+def analizza_batch(testi):
+    """Analizza più testi insieme: un array NumPy per metrica, un elemento per testo"""
+    import numpy as np
     
-    lunghezza_media_frasi = parole_totali / frasi_totali if frasi_totali > 0 else 0
-    vocab_unico = len(set(parole))
-    ricchezza_lessicale = vocab_unico / parole_totali if parole_totali > 0 else 0
-    leggibilita = calcola_leggibilita_semplice(testo)
+    n = len(testi)
+    parole_totali = np.empty(n, dtype=np.int32)
+    frasi_totali = np.empty(n, dtype=np.int32)
+    vocab_unico = np.empty(n, dtype=np.int32)
+    lettere = np.empty(n, dtype=np.int32)
+    positive = np.empty(n, dtype=np.int32)
+    negative = np.empty(n, dtype=np.int32)
+    conteggi_pos = np.empty((4, n), dtype=np.int32)
     
-    # Stime approssimative per parti del discorso
-    aggettivi = len(parole) // 10
-    avverbi = len(parole) // 20
-    verbi = len(parole) // 5
-    sostantivi = len(parole) // 3
+    # Solo i conteggi richiedono un ciclo per testo
+    for i, (parole, frasi, tagged) in enumerate(_tokenizza_batch(testi)):
+        conteggi_parole = Counter(map(str.lower, parole))
+        parole_totali[i] = len(parole)
+        frasi_totali[i] = frasi
+        vocab_unico[i] = len(conteggi_parole)
+        lettere[i] = conta_lettere(conteggi_parole)
+        positive[i], negative[i] = conta_tono(conteggi_parole)
+        conteggi_pos[:, i] = conta_pos(tagged)
     
-    # Analisi del tono
-    parole_pos_lista = ['buono', 'bello', 'fantastico', 'eccellente', 'meraviglioso', 'positivo', 'felice', 'gioia']
-    parole_neg_lista = ['cattivo', 'brutto', 'terribile', 'orribile', 'pessimo', 'negativo', 'triste', 'dolore']
+    # Metriche derivate, su tutti i testi insieme; le divisioni per zero
+    # producono valori scartati da np.where
+    con_parole = parole_totali > 0
+    con_frasi = frasi_totali > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lunghezza_media_frasi = np.where(con_frasi, parole_totali / frasi_totali, 0.0)
+        ricchezza_lessicale = np.where(con_parole, vocab_unico / parole_totali, 0.0)
+        leggibilita = _formula_leggibilita(lunghezza_media_frasi, lettere / parole_totali)
+        tono_positivo = np.where(con_parole, positive / parole_totali, 0.0)
+        tono_negativo = np.where(con_parole, negative / parole_totali, 0.0)
+    leggibilita = np.where(con_parole & con_frasi,
+                           np.clip(leggibilita, *_LIMITI_LEGGIBILITA),
+                           _LEGGIBILITA_NEUTRA)
     
-    parole_positive = sum(1 for word in parole if word in parole_pos_lista)
-    parole_negative = sum(1 for word in parole if word in parole_neg_lista)
-    tono_positivo = parole_positive / parole_totali if parole_totali > 0 else 0
-    tono_negativo = parole_negative / parole_totali if parole_totali > 0 else 0
+    # Analisi controlla che ci siano tutti e soli i suoi campi: le chiavi
+    # restano quelle dell'analisi di un singolo testo
+    aggettivi, avverbi, verbi, sostantivi = conteggi_pos
+    return Analisi(
+        parole_totali=parole_totali,
+        frasi_totali=frasi_totali,
+        lunghezza_media_frasi=lunghezza_media_frasi,
+        vocab_unico=vocab_unico,
+        ricchezza_lessicale=ricchezza_lessicale,
+        aggettivi=aggettivi,
+        avverbi=avverbi,
+        verbi=verbi,
+        sostantivi=sostantivi,
+        leggibilita=leggibilita,
+        tono_positivo=tono_positivo,
+        tono_negativo=tono_negativo
+    )._asdict()
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def analizza_stile_semplice(testo):
+    """Analisi semplificata senza NLTK"""
+    parole = tokenizza_testo_semplice(testo)
     
-    return {
-        'parole_totali': parole_totali,
-        'frasi_totali': frasi_totali,
-        'lunghezza_media_frasi': lunghezza_media_frasi,
-        'vocab_unico': vocab_unico,
-        'ricchezza_lessicale': ricchezza_lessicale,
-        'aggettivi': aggettivi,
-        'avverbi': avverbi,
-        'verbi': verbi,
-        'sostantivi': sostantivi,
-        'leggibilita': leggibilita,
-        'tono_positivo': tono_positivo,
-        'tono_negativo': tono_negativo
-    }
+    # Parti del discorso stimate dai suffissi
+    return calcola_metriche(parole, conta_frasi_semplice(testo), conta_pos(stima_pos(parole)))
 
 def determina_stile_dominante(analisi):
     """Determina lo stile di scrittura dominante"""
-    punteggi = {
-        'narrativo': 0,
-        'descrittivo': 0,
-        'argomentativo': 0,
-        'espositivo': 0
-    }
+    parole_totali = analisi.parole_totali
+    if parole_totali == 0:
+        # Testo vuoto: frasi e ricchezza a zero, leggibilità neutra
+        return 'espositivo'
+    lunghezza_media_frasi = analisi.lunghezza_media_frasi
     
-    if analisi['parole_totali'] > 0:
-        # Narrativo: molti verbi
-        punteggi['narrativo'] += analisi['verbi'] / analisi['parole_totali']
-        punteggi['narrativo'] += 0.5 if 15 <= analisi['lunghezza_media_frasi'] <= 25 else 0
-        
-        # Descrittivo: molti aggettivi
-        punteggi['descrittivo'] += analisi['aggettivi'] / analisi['parole_totali']
+    # Narrativo: molti verbi
+    narrativo = analisi.verbi / parole_totali + 0.5 * (15 <= lunghezza_media_frasi <= 25)
+    
+    # Descrittivo: molti aggettivi
+    descrittivo = analisi.aggettivi / parole_totali
     
     # Argomentativo: ricchezza lessicale
-    punteggi['argomentativo'] += analisi['ricchezza_lessicale']
-    punteggi['argomentativo'] += 0.5 if analisi['lunghezza_media_frasi'] > 20 else 0
+    argomentativo = analisi.ricchezza_lessicale + 0.5 * (lunghezza_media_frasi > 20)
     
     # Espositivo: buona leggibilità
-    punteggi['espositivo'] += 1 - abs(70 - analisi['leggibilita']) / 70
+    espositivo = 1 - abs(70 - analisi.leggibilita) / 70
     
-    return max(punteggi, key=punteggi.get)
+    # A parità di punteggio vince lo stile che precede
+    stile, migliore = 'narrativo', narrativo
+    if descrittivo > migliore:
+        stile, migliore = 'descrittivo', descrittivo
+    if argomentativo > migliore:
+        stile, migliore = 'argomentativo', argomentativo
+    if espositivo > migliore:
+        stile = 'espositivo'
+    return stile
 
 # Strategie per intelligenze multiple
+_STRATEGIE = MappingProxyType({
+    'Linguistica': (
+        "Amplia il tuo vocabolario leggendo autori di generi diversi",
+        "Esercitati con giochi di parole e cruciverba",
+        "Scrivi piccoli racconti utilizzando parole nuove",
+        "Analizza la struttura di testi che ammiri"
+    ),
+    'Logico-Matematica': (
+        "Organizza i tuoi testi con struttura logica chiara",
+        "Utilizza connettivi logici per legare le idee",
+        "Crea mappe concettuali prima di scrivere",
+        "Supporta le argomentazioni con dati"
+    ),
+    'Spaziale': (
+        "Usa metafore visive nelle descrizioni",
+        "Disegna le scene prima di descriverle",
+        "Organizza il testo con struttura visivamente chiara",
+        "Utilizza diagrammi per pianificare"
+    )
+})
+
+_STRATEGIE_SPECIFICHE = MappingProxyType({
+    'narrativo': (
+        "Sviluppa personaggi multidimensionali",
+        "Crea una struttura temporale chiara",
+        "Usa dialoghi vivaci",
+        "Descrivi ambienti in modo coinvolgente"
+    ),
+    'descrittivo': (
+        "Coinvolgi tutti i sensi nelle descrizioni",
+        "Usa similitudini e metafore originali",
+        "Organizza le descrizioni in modo logico",
+        "Scegli aggettivi precisi e evocativi"
+    ),
+    'argomentativo': (
+        "Struttura logicamente le argomentazioni",
+        "Anticipa e confuta le obiezioni",
+        "Usa linguaggio preciso e convincente",
+        "Supporta con esempi concreti"
+    ),
+    'espositivo': (
+        "Organizza informazioni in modo chiaro",
+        "Usa analogie per spiegare concetti complessi",
+        "Adatta il linguaggio al pubblico",
+        "Mantieni tono equilibrato e oggettivo"
+    )
+})
+
 def strategie_intelligenze_multiple(stile_dominante):
-    strategie = {
-        'Linguistica': [
-            "Amplia il tuo vocabolario leggendo autori di generi diversi",
-            "Esercitati con giochi di parole e cruciverba",
-            "Scrivi piccoli racconti utilizzando parole nuove",
-            "Analizza la struttura di testi che ammiri"
-        ],
-        'Logico-Matematica': [
-            "Organizza i tuoi testi con struttura logica chiara",
-            "Utilizza connettivi logici per legare le idee",
-            "Crea mappe concettuali prima di scrivere",
-            "Supporta le argomentazioni con dati"
-        ],
-        'Spaziale': [
-            "Usa metafore visive nelle descrizioni",
-            "Disegna le scene prima di descriverle",
-            "Organizza il testo con struttura visivamente chiara",
-            "Utilizza diagrammi per pianificare"
-        ]
-    }
-    
-    strategie_specifiche = {
-        'narrativo': [
-            "Sviluppa personaggi multidimensionali",
-            "Crea una struttura temporale chiara",
-            "Usa dialoghi vivaci",
-            "Descrivi ambienti in modo coinvolgente"
-        ],
-        'descrittivo': [
-            "Coinvolgi tutti i sensi nelle descrizioni",
-            "Usa similitudini e metafore originali",
-            "Organizza le descrizioni in modo logico",
-            "Scegli aggettivi precisi e evocativi"
-        ],
-        'argomentativo': [
-            "Struttura logicamente le argomentazioni",
-            "Anticipa e confuta le obiezioni",
-            "Usa linguaggio preciso e convincente",
-            "Supporta con esempi concreti"
-        ],
-        'espositivo': [
-            "Organizza informazioni in modo chiaro",
-            "Usa analogie per spiegare concetti complessi",
-            "Adatta il linguaggio al pubblico",
-            "Mantieni tono equilibrato e oggettivo"
-        ]
-    }
-    
-    return strategie, strategie_specifiche.get(stile_dominante, [])
+    return _STRATEGIE, _STRATEGIE_SPECIFICHE.get(stile_dominante, ())
+
+# Testi dell'interfaccia
+_TESTO_ESEMPIO = """La città si svegliava lentamente sotto un cielo color pesca. Le prime luci del mattino accarezzavano i tetti delle case, dipingendo ombre lunghe e sottili sui marciapiedi ancora deserti. Marco camminava a passi lenti, assaporando il silenzio irreale che precede il caos della giornata. Ogni respiro gli sembrava più profondo, ogni pensiero più chiaro. In quei momenti di tranquillità, riusciva finalmente ad ascoltare la voce sottile della sua anima."""
+
+_DESCRIZIONI_STILI = MappingProxyType({
+    'narrativo': "Focus su eventi e sequenze temporali",
+    'descrittivo': "Focus su dettagli sensoriali e descrizioni",
+    'argomentativo': "Focus su logica e persuasione",
+    'espositivo': "Focus su chiarezza e organizzazione"
+})
 
 # Interfaccia principale
 tab1, tab2, tab3 = st.tabs(["📝 Analisi Testo", "📊 Risultati", "🎯 Strategie"])
@@ -272,31 +555,33 @@ tab1, tab2, tab3 = st.tabs(["📝 Analisi Testo", "📊 Risultati", "🎯 Strate
 with tab1:
     st.header("Inserisci il tuo testo")
     
-    testo_esempio = """La città si svegliava lentamente sotto un cielo color pesca. Le prime luci del mattino accarezzavano i tetti delle case, dipingendo ombre lunghe e sottili sui marciapiedi ancora deserti. Marco camminava a passi lenti, assaporando il silenzio irreale che precede il caos della giornata. Ogni respiro gli sembrava più profondo, ogni pensiero più chiaro. In quei momenti di tranquillità, riusciva finalmente ad ascoltare la voce sottile della sua anima."""
-    
     testo_utente = st.text_area(
         "Incolla il tuo testo qui sotto (minimo 50 parole):",
-        value=testo_esempio,
+        value=_TESTO_ESEMPIO,
         height=300
     )
     
     if st.button("Analizza il mio stile"):
-        if nltk_available:
-            parole_count = len(word_tokenize(testo_utente))
+        hash_testo = hash(testo_utente)
+        
+        if st.session_state.get('hash_testo') == hash_testo and 'analisi' in st.session_state:
+            # Testo invariato: i risultati in sessione sono già aggiornati
+            st.success("Analisi completata!")
         else:
-            parole_count = len(tokenizza_testo_semplice(testo_utente))
+            parole_count = conta_parole(testo_utente)
             
-        if parole_count < 50:
-            st.warning(f"Testo troppo breve ({parole_count} parole). Inserisci almeno 50 parole.")
-        else:
-            with st.spinner("Analizzando il tuo stile..."):
-                analisi = analizza_stile(testo_utente)
-                stile_dominante = determina_stile_dominante(analisi)
-                
-                st.session_state.analisi = analisi
-                st.session_state.stile_dominante = stile_dominante
-                
-            st.success("Analisi completata!")
+            if parole_count < 50:
+                st.warning(f"Testo troppo breve ({parole_count} parole). Inserisci almeno 50 parole.")
+            else:
+                with st.spinner("Analizzando il tuo stile..."):
+                    analisi = analizza_stile(testo_utente)
+                    stile_dominante = determina_stile_dominante(analisi)
+                    
+                    st.session_state.analisi = analisi
+                    st.session_state.stile_dominante = stile_dominante
+                    st.session_state.hash_testo = hash_testo
+                    
+                st.success("Analisi completata!")
 
 with tab2:
     st.header("Risultati dell'Analisi")
@@ -304,6 +589,8 @@ with tab2:
     if 'analisi' not in st.session_state:
         st.info("Inserisci un testo per vedere i risultati.")
     else:
+        import pandas as pd
+        
         analisi = st.session_state.analisi
         stile_dominante = st.session_state.stile_dominante
         
@@ -312,12 +599,12 @@ with tab2:
         with col1:
             st.subheader("Metriche di Base")
             metriche = {
-                "Parole totali": analisi['parole_totali'],
-                "Frasi totali": analisi['frasi_totali'],
-                "Lunghezza media frasi": f"{analisi['lunghezza_media_frasi']:.1f} parole",
-                "Vocabolario unico": analisi['vocab_unico'],
-                "Ricchezza lessicale": f"{analisi['ricchezza_lessicale']*100:.1f}%",
-                "Leggibilità": f"{analisi['leggibilita']:.1f}/100"
+                "Parole totali": analisi.parole_totali,
+                "Frasi totali": analisi.frasi_totali,
+                "Lunghezza media frasi": f"{analisi.lunghezza_media_frasi:.1f} parole",
+                "Vocabolario unico": analisi.vocab_unico,
+                "Ricchezza lessicale": f"{analisi.ricchezza_lessicale*100:.1f}%",
+                "Leggibilità": f"{analisi.leggibilita:.1f}/100"
             }
             
             for k, v in metriche.items():
@@ -325,25 +612,15 @@ with tab2:
         
         with col2:
             st.subheader("Composizione")
-            df = pd.DataFrame({
-                'Tipo': ['Sostantivi', 'Verbi', 'Aggettivi', 'Avverbi'],
-                'Quantità': [
-                    analisi['sostantivi'],
-                    analisi['verbi'], 
-                    analisi['aggettivi'],
-                    analisi['avverbi']
-                ]
-            })
-            st.bar_chart(df.set_index('Tipo'))
+            st.bar_chart(pd.Series({
+                'Sostantivi': analisi.sostantivi,
+                'Verbi': analisi.verbi,
+                'Aggettivi': analisi.aggettivi,
+                'Avverbi': analisi.avverbi
+            }, name='Quantità').rename_axis('Tipo'))
         
         st.subheader(f"Stile Dominante: {stile_dominante.capitalize()}")
-        descrizioni = {
-            'narrativo': "Focus su eventi e sequenze temporali",
-            'descrittivo': "Focus su dettagli sensoriali e descrizioni", 
-            'argomentativo': "Focus su logica e persuasione",
-            'espositivo': "Focus su chiarezza e organizzazione"
-        }
-        st.info(descrizioni.get(stile_dominante, ""))
+        st.info(_DESCRIZIONI_STILI.get(stile_dominante, ""))
 
 with tab3:
     st.header("Strategie Personalizzate")